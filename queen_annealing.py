@@ -7,6 +7,8 @@ import sys
 import random
 import math
 import os
+import itertools
+from array import array
 
 # For reproducibility
 # random.seed(42)  
@@ -22,25 +24,42 @@ class NQueensGUI:
         
         self.available_sizes = [4,5, 6,7, 8]
         self.n = 4  # Default size
-        self.solution = []
-        self.current_state = []
-        self.mode = "annealing"
-        self.steps = []
-        self.current_step = 0
+        # State is a flat byte array indexed by column holding that column's queen
+        # row (-1 = empty). A full state is a permutation of rows, so only
+        # diagonals can conflict.
+        self.current_state = array('b', [-1] * self.n)
+        self.clear_occupancy()
+        self.clear_steps()
         self.is_solving = False
         self.annealing_generator = None
+        self.solve_frames = 0  # Frames drawn since the current solve started
+        self.frame_budget_ms = 12  # Longest the solver may run within one frame
         self.is_fullscreen = False
+        self.needs_redraw = True
+        self.dirty_rects = []  # Screen areas to present when only hover state changed
+        self.solver_dirty = False  # A solver step changed only the board and panel
+        self.hovered_button = None
         
         # Simulated Annealing parameters
-        self.initial_temperature = 100.0
-        self.cooling_rate = 0.95
-        self.min_temperature = 0.1
+        # The temperature follows the Modified Lam schedule: after every proposal it
+        # is multiplied or divided by cooling_rate to steer the acceptance rate
+        # toward a target that falls over the course of each chain
+        self.initial_temperature = 1.0
+        self.cooling_rate = 0.999
         self.max_iterations = 200_000
+        self.record_interval = 10  # Snapshot the board every this many iterations
+        self.max_restarts = 4  # Fresh chains to try if one ends without a solution
+        self.patience_per_queen = 2000  # End a chain after n times this many iterations without a new best
         self.current_temperature = self.initial_temperature
         self.current_iteration = 0
         self.best_state = None
         self.best_energy = float('inf')
         
+        # Boards up to this size have so few permutations (4! = 24) that they are
+        # enumerated exhaustively instead of annealed; set to 0 to always anneal
+        self.exhaustive_max_n = 4
+        self.select_mode()
+        
         # Set initial window size based on system resolution
         self.setup_window_size()
         
@@ -105,15 +124,25 @@ class NQueensGUI:
         self.BOARD_SIZE = self.CELL_SIZE * self.n
 
     def load_assets(self):
-        pygame.mixer.init()
+        self.chirp_channel = None
+        self.last_chirp_ms = 0
+        self.chirp_interval_ms = 80
+        try:
+            pygame.mixer.init()
+            # At most a few short effects overlap, so mix 4 channels instead of the
+            # default 8; solver chirps get a reserved one so they never churn the rest
+            pygame.mixer.set_num_channels(4)
+            pygame.mixer.set_reserved(1)
+            self.chirp_channel = pygame.mixer.Channel(0)
+        except:
+            # No audio device; the sounds below fail to load and stay silent
+            pass
         try:
             self.move_sound = pygame.mixer.Sound("./assets/n_queens/move.mp3")
             self.error_sound = pygame.mixer.Sound("./assets/n_queens/incorrect.mp3")
             self.win_sound = pygame.mixer.Sound("./assets/n_queens/finish.mp3")
             self.premove_sound = pygame.mixer.Sound("./assets/n_queens/premove.mp3")
             self.gameend_sound = pygame.mixer.Sound("./assets/n_queens/game-end.mp3")
-            self.icon = pygame.image.load("./assets/n_queens/icon.png")
-            pygame.display.set_icon(self.icon)
         except:
             # Create dummy sounds if assets not found
             self.move_sound = None
@@ -121,6 +150,102 @@ class NQueensGUI:
             self.win_sound = None
             self.premove_sound = None
             self.gameend_sound = None
+        if self.move_sound:
+            try:
+                self.prime_sounds()
+            except:
+                pass  # Priming only avoids a first-play stall; the sounds still work
+        try:
+            self.icon = pygame.image.load("./assets/n_queens/icon.png").convert_alpha()
+            pygame.display.set_icon(self.icon)
+        except:
+            pass
+        try:
+            # Decode the queen image once; draw_queen blits a pre-scaled copy
+            self.queen_img_raw = pygame.image.load("./assets/n_queens/queen.png").convert_alpha()
+        except:
+            self.queen_img_raw = None
+
+    def prime_sounds(self):
+        """Play each sound once at zero volume so the first real play doesn't stall"""
+        for sound in (self.move_sound, self.error_sound, self.win_sound,
+                      self.premove_sound, self.gameend_sound):
+            sound.set_volume(0)
+            channel = sound.play()
+            if channel:
+                channel.stop()
+            sound.set_volume(1)
+
+    def init_panel_text(self):
+        """Pre-render side panel text that only changes with the layout or board size"""
+        title = "Exhaustive Search" if self.mode == "exhaustive" else "Simulated Annealing"
+        self.panel_title = self.info_font.render(title, True, self.FONT_COLOR)
+        self.panel_board_info = self.info_font.render(f"Board: {self.n}x{self.n}", True, self.FONT_COLOR)
+        
+        # Parameters (abbreviated for smaller screens); the enumeration has none to tune
+        if self.mode == "annealing":
+            params = [
+                f"Initial Temp: {self.initial_temperature}",
+                f"Cooling: Lam x{self.cooling_rate}",
+                f"Max Iter: {self.max_iterations}"
+            ]
+        else:
+            params = [f"Permutations: {math.factorial(self.n)}"]
+        self.panel_params = [self.size_font.render(param, True, self.FONT_COLOR)
+                             for param in params]
+        
+        instructions = [
+            "Instructions:",
+            "1. Select board size",
+            "2. One queen per row/col",
+            f"3. Place all {self.n} queens",
+            "4. Click 'Solve'",
+            "5. Use step buttons"
+        ]
+        self.panel_instructions = [
+            self.size_font.render(instruction, True, self.FONT_COLOR if i == 0 else (100, 100, 100))
+            for i, instruction in enumerate(instructions)
+        ]
+
+    def render_text(self, text, font, color):
+        """Render text with a fixed font, reusing the surface from earlier frames"""
+        key = (text, font, color)
+        surf = self.text_cache.get(key)
+        if surf is None:
+            # Dynamic strings (temperatures, step counters) are unbounded; start over
+            # rather than let the cache grow without limit
+            if len(self.text_cache) >= 512:
+                self.text_cache.clear()
+            surf = font.render(text, True, color)
+            self.text_cache[key] = surf
+        return surf
+
+    def render_label(self, text, font_size, color):
+        """Render a button label at a given font size, cached like render_text"""
+        key = (text, font_size, color)
+        surf = self.text_cache.get(key)
+        if surf is None:
+            label_font = self.label_fonts.get(font_size)
+            if label_font is None:
+                # Looking up a system font is far slower than rendering with it
+                label_font = pygame.font.SysFont('Segoe UI', font_size)
+                self.label_fonts[font_size] = label_font
+            surf = label_font.render(text, True, color)
+            self.text_cache[key] = surf
+        return surf
+
+    def button_surface(self, text, size, color, text_color, font_size, border_radius):
+        """Render a button's background and centered label once and reuse it"""
+        key = (text, size, color, text_color, font_size, border_radius)
+        surf = self.button_cache.get(key)
+        if surf is None:
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(surf, color, surf.get_rect(), border_radius=border_radius)
+            label = self.render_label(text, font_size, text_color)
+            surf.blit(label, label.get_rect(center=surf.get_rect().center))
+            surf = surf.convert_alpha()
+            self.button_cache[key] = surf
+        return surf
 
     def init_ui_elements(self):
         """Initialize UI elements with responsive positioning"""
@@ -132,6 +257,13 @@ class NQueensGUI:
         self.info_font = pygame.font.SysFont('Segoe UI', max(14, int(18 * base_scale)))
         self.size_font = pygame.font.SysFont('Segoe UI', max(12, int(16 * base_scale)))
         
+        # Rendered text, button label fonts and whole buttons are cached per
+        # layout since fonts and button sizes are recreated with it
+        self.text_cache = {}
+        self.label_fonts = {}
+        self.button_cache = {}
+        self.init_panel_text()
+        
         # Calculate responsive margins
         margin_left = max(20, int(self.WINDOW_WIDTH * 0.05))
         margin_top = max(80, int(self.WINDOW_HEIGHT * 0.08))
@@ -207,6 +339,41 @@ class NQueensGUI:
         fs_height = max(30, int(self.WINDOW_HEIGHT * 0.035))
         self.fullscreen_rect = pygame.Rect(self.WINDOW_WIDTH - fs_width - 20, 20, 
                                           fs_width, fs_height)
+        
+        # Every rect whose color depends on hover state
+        self.hover_rects = list(self.size_buttons.values()) + [
+            self.solve_rect, self.reset_rect, self.prev_step_rect,
+            self.next_step_rect, self.fullscreen_rect]
+        
+        # Click targets and their handlers, tried in order by handle_click
+        self.click_handlers = [(self.fullscreen_rect, self.toggle_fullscreen)]
+        self.click_handlers += [(rect, lambda size=size: self.change_board_size(size))
+                                for size, rect in self.size_buttons.items()]
+        self.click_handlers += [
+            (self.solve_rect, self.start_solve), (self.reset_rect, self.reset_board),
+            (self.prev_step_rect, self.prev_step), (self.next_step_rect, self.next_step)]
+        
+        # Scale the queen image once per cell size instead of every frame; since
+        # this is one-time work, use the higher quality smoothscale filter
+        if self.queen_img_raw:
+            self.queen_img = pygame.transform.smoothscale(self.queen_img_raw,
+                                                    (self.CELL_SIZE-10, self.CELL_SIZE-10))
+        else:
+            self.queen_img = None
+        
+        # Static board render, rebuilt whenever the layout changes
+        self.build_board_surface()
+        
+        # Areas a solver step can change: the board with its border, and the
+        # panel column including the control buttons below it
+        border = self.board_border
+        self.solver_rects = [
+            pygame.Rect(self.board_x - border, self.board_y - border,
+                        self.BOARD_SIZE + border * 2, self.BOARD_SIZE + border * 2),
+            pygame.Rect(self.panel_x, self.panel_y, self.panel_width, self.panel_height).unionall(
+                [self.solve_rect, self.reset_rect, self.prev_step_rect, self.next_step_rect])]
+        
+        self.build_background()
 
     def toggle_fullscreen(self):
         """Toggle between fullscreen and windowed mode"""
@@ -225,37 +392,103 @@ class NQueensGUI:
         self.update_board_sizing()
         self.init_ui_elements()
 
+    def clear_occupancy(self):
+        """Reset the bitmasks of rows and columns holding a manually placed queen.
+        
+        Solving and step navigation only ever replace a full board with another
+        full permutation, so the masks stay valid until the board is cleared.
+        """
+        self.used_rows = 0
+        self.used_cols = 0
+
+    def is_board_full(self):
+        """Check whether every column has a queen"""
+        return self.used_cols == (1 << self.n) - 1
+
+    def select_mode(self):
+        """Pick exhaustive enumeration for tiny boards, annealing otherwise"""
+        self.mode = "exhaustive" if self.n <= self.exhaustive_max_n else "annealing"
+
     def count_attacks(self, state):
         """Count the number of pairs of queens that are attacking each other"""
+        # Rows and columns are distinct by construction, so only diagonals can
+        # conflict. Bucket queens by diagonal (row+col) and anti-diagonal
+        # (row-col+n) in one pass: each queen attacks every earlier queen that
+        # already sits in either of its buckets.
+        n = len(state)
+        diag = [0] * (2 * n)
+        anti = [0] * (2 * n)
         attacks = 0
-        for i in range(len(state)):
-            for j in range(i + 1, len(state)):
-                # Check same row
-                if state[i][0] == state[j][0]:
-                    attacks += 1
-                # Check diagonal
-                if abs(state[i][0] - state[j][0]) == abs(state[i][1] - state[j][1]):
-                    attacks += 1
+        for col, row in enumerate(state):
+            d = row + col
+            a = row - col + n
+            attacks += diag[d] + anti[a]
+            diag[d] += 1
+            anti[a] += 1
         return attacks
 
-    def get_random_neighbor(self, state):
-        """Generate a random neighboring state by moving one queen"""
-        new_state = state.copy()
-        # Randomly select a queen to move
-        queen_idx = random.randint(0, self.n-1)
-        # Randomly select a new row for the queen
-        new_row = random.randint(0, self.n-1)
-        new_state[queen_idx] = (new_row, queen_idx)
-        return new_state
-
-    def record_step(self, state, energy, description=""):
+    def diagonal_histograms(self, state):
+        """Count queens on each diagonal (row+col) and anti-diagonal (row-col+n)"""
+        n = len(state)
+        diag = [0] * (2 * n)
+        anti = [0] * (2 * n)
+        for col, row in enumerate(state):
+            diag[row + col] += 1
+            anti[row - col + n] += 1
+        return diag, anti
+
+    def swap_queens(self, state, diag, anti, i, j):
+        """Swap the rows of queens i and j in place and return the change in attacks.
+        
+        Only the four diagonal buckets the two queens leave and enter change, so
+        the delta is computed in O(1) from the histograms, which are kept in sync.
+        Swapping the same pair again undoes the move.
+        """
+        n = len(state)
+        row_i, row_j = state[i], state[j]
+        delta = 0
+        # Lift both queens off the board
+        for col, row in ((i, row_i), (j, row_j)):
+            diag[row + col] -= 1
+            anti[row - col + n] -= 1
+            delta -= diag[row + col] + anti[row - col + n]
+        # Put them back with their rows exchanged
+        for col, row in ((i, row_j), (j, row_i)):
+            delta += diag[row + col] + anti[row - col + n]
+            diag[row + col] += 1
+            anti[row - col + n] += 1
+        state[i], state[j] = row_j, row_i
+        return delta
+
+    def clear_steps(self):
+        """Empty the recorded solution steps"""
+        # Steps live in flat parallel buffers rather than one dict per step:
+        # step k's board is bytes k*n to (k+1)*n of step_states
+        self.step_states = array('b')
+        self.step_energies = array('i')
+        self.step_descriptions = []
+        self.step_values = array('d')
+        self.current_step = 0
+
+    def record_step(self, state, energy, description="", value=0.0):
         """Record a step in the solution process"""
-        self.steps.append({
-            'state': state.copy(),
-            'energy': energy,
-            'description': description
-        })
-        self.current_step = len(self.steps) - 1
+        # The description is a template with optional {energy} and {value} fields,
+        # filled in by describe_step only when the step is displayed, so the
+        # solver loop never formats strings
+        self.step_states.extend(state)
+        self.step_energies.append(energy)
+        self.step_descriptions.append(description)
+        self.step_values.append(value)
+        self.current_step = len(self.step_energies) - 1
+
+    def describe_step(self, step):
+        """Return the formatted description of a recorded step"""
+        return self.step_descriptions[step].format(energy=self.step_energies[step],
+                                                   value=self.step_values[step])
+
+    def step_state(self, step):
+        """Return a copy of the board recorded at the given step"""
+        return self.step_states[step * self.n:(step + 1) * self.n]
 
     def play_sound(self, sound):
         """Safely play sound if available"""
@@ -265,68 +498,204 @@ class NQueensGUI:
             except:
                 pass
 
+    def play_chirp(self):
+        """Play the premove sound for solver progress, at most once per chirp interval"""
+        now = pygame.time.get_ticks()
+        if (self.premove_sound and self.chirp_channel
+                and now - self.last_chirp_ms >= self.chirp_interval_ms):
+            self.last_chirp_ms = now
+            try:
+                self.chirp_channel.play(self.premove_sound)
+            except:
+                pass
+
     def simulated_annealing(self):
         """Solve N-Queens using simulated annealing"""
         self.is_solving = True
-        self.steps = []
+        self.clear_steps()
         self.current_temperature = self.initial_temperature
         self.current_iteration = 0
-        self.best_state = self.current_state.copy()
+        self.best_state = self.current_state[:]
         self.best_energy = self.count_attacks(self.best_state)
         
         # Record initial state
         self.record_step(self.best_state, self.best_energy, "Initial State")
         yield
         
-        while (self.current_temperature > self.min_temperature and 
-               self.current_iteration < self.max_iterations and 
-               self.best_energy > 0):
+        # The hot loop works on locals and syncs them back to self only before
+        # each yield, when the GUI may read them. The state is mutated in place.
+        state = self.current_state
+        temperature = self.current_temperature
+        iteration = 0
+        best_energy = self.best_energy
+        
+        # Energy is tracked incrementally from the diagonal histograms
+        current_energy = best_energy
+        diag, anti = self.diagonal_histograms(state)
+        
+        # Bind hot-loop callables and constants to locals
+        log = math.log
+        rand = random.random
+        swap = self.swap_queens
+        chirp = self.play_chirp
+        record = self.record_step
+        cool = self.cooling_rate
+        max_iterations = self.max_iterations
+        record_interval = self.record_interval
+        n = self.n
+        
+        # The iteration budget is split evenly between the first chain and its
+        # restarts, and each chain runs the full Lam schedule over its share
+        chain_length = max_iterations // (self.max_restarts + 1)
+        chain_start = 0
+        accept_rate = 0.5  # Moving average over roughly the last 500 proposals
+        
+        # Target acceptance rate: from 1 down to 0.44 over the first 15% of the
+        # chain, held until 65%, then decaying exponentially toward 0. The decays
+        # are per-move factors so the hot loop only multiplies
+        warmup_decay = 560 ** (-1 / (0.15 * chain_length))
+        final_decay = 440 ** (-1 / (0.35 * chain_length))
+        
+        # A chain that has stagnated for this long is unlikely to improve before its
+        # schedule ends, so it restarts early instead
+        patience = self.patience_per_queen * n
+        last_improvement = 0
+        
+        restarts = 0
+        while True:
+            warmup_end = chain_start + 0.15 * chain_length
+            hold_end = chain_start + 0.65 * chain_length
+            target_excess = 0.56  # Warm-up target above the 0.44 plateau
+            target = 0.44
+            while (iteration - chain_start < chain_length and
+                   iteration - last_improvement < patience and best_energy > 0):
+                # Play premove sound during solving process (rate limited to avoid spam)
+                chirp()
+                
+                # Move to a random neighbor by swapping the rows of two distinct queens.
+                # Two random() draws are much cheaper than random.sample(range(n), 2).
+                i = int(rand() * n)
+                j = int(rand() * (n - 1))
+                if j >= i:
+                    j += 1
+                energy_diff = swap(state, diag, anti, i, j)
+                
+                # Accept if not worse, or with probability exp(-diff/T). The equivalent
+                # test -T*log(u) > diff avoids the division, and sideways moves skip
+                # libm entirely (1 - u keeps log's argument in (0, 1])
+                accepted = energy_diff <= 0 or -temperature * log(1.0 - rand()) > energy_diff
+                if accepted:
+                    current_energy += energy_diff
+                    if current_energy < best_energy:
+                        best_energy = current_energy
+                        last_improvement = iteration
+                        self.best_state = state[:]
+                        self.best_energy = best_energy
+                        self.current_temperature = temperature
+                        self.current_iteration = iteration
+                        # Play premove sound when finding better state
+                        chirp()
+                        record(self.best_state, best_energy,
+                               "New Best State Found! Energy: {energy}")
+                        yield
+                        if best_energy == 0:
+                            break
+                else:
+                    # Rejected: swapping the same pair back restores state and histograms
+                    swap(state, diag, anti, i, j)
+                
+                # Advance the target acceptance rate along the schedule
+                accept_rate = 0.998 * accept_rate + 0.002 * accepted
+                if iteration < warmup_end:
+                    target = 0.44 + target_excess
+                    target_excess *= warmup_decay
+                elif iteration >= hold_end:
+                    target *= final_decay
+                
+                # Cool down while accepting too much, heat up while accepting too little
+                if accept_rate > target:
+                    temperature *= cool
+                else:
+                    temperature /= cool
+                iteration += 1
+                
+                # Record a snapshot every record_interval iterations
+                if iteration % record_interval == 0:
+                    self.current_temperature = temperature
+                    self.current_iteration = iteration
+                    record(state, best_energy,
+                           "Annealing - Temperature: {value:.2f}", temperature)
+                    yield
             
-            # Play premove sound during solving process (every 5th iteration to avoid spam)
-            if self.current_iteration % 5 == 0:
-                self.play_sound(self.premove_sound)
+            self.current_temperature = temperature
+            self.current_iteration = iteration
+            if best_energy == 0 or restarts >= self.max_restarts or iteration >= max_iterations:
+                break
             
-            # Record temperature and iteration info
-            self.record_step(self.current_state, self.best_energy,
-                           f"Temperature: {self.current_temperature:.2f}, Iteration: {self.current_iteration}")
+            # The chain ended without a solution: reheat and run a fresh,
+            # independent chain from a random permutation, keeping the global best
+            restarts += 1
+            chain_start = iteration
+            last_improvement = iteration
+            accept_rate = 0.5
+            random.shuffle(state)
+            current_energy = self.count_attacks(state)
+            diag, anti = self.diagonal_histograms(state)
+            temperature = self.initial_temperature
+            self.current_temperature = temperature
+            record(state, best_energy, f"Restart {restarts}/{self.max_restarts} - Reheating")
             yield
+        
+        # Record final state
+        self.current_state = self.best_state[:]
+        if self.best_energy == 0:
+            self.record_step(self.best_state, self.best_energy, "Solution Found!")
+            self.play_sound(self.win_sound)
+        else:
+            self.record_step(self.best_state, self.best_energy,
+                           "Best State Found (Energy: {energy})")
+        
+        # Always play game-end sound when solving process completes
+        self.play_sound(self.gameend_sound)
+        self.is_solving = False
+        yield
+
+    def exhaustive_search(self):
+        """Solve small boards by enumerating every row permutation"""
+        self.is_solving = True
+        self.clear_steps()
+        self.current_iteration = 0
+        self.best_state = self.current_state[:]
+        self.best_energy = self.count_attacks(self.best_state)
+        
+        # Record initial state
+        self.record_step(self.best_state, self.best_energy, "Initial State")
+        yield
+        
+        template = f"Permutation {{value:.0f}}/{math.factorial(self.n)}, Attacks: {{energy}}"
+        for perm in itertools.permutations(range(self.n)):
+            if self.best_energy == 0:
+                break
             
-            # Generate neighbor
-            neighbor = self.get_random_neighbor(self.current_state)
-            neighbor_energy = self.count_attacks(neighbor)
-            
-            # Calculate energy difference
-            energy_diff = neighbor_energy - self.best_energy
-            
-            # Accept if better or with probability based on temperature
-            if energy_diff < 0 or random.random() < math.exp(-energy_diff / self.current_temperature):
-                self.current_state = neighbor
-                if neighbor_energy < self.best_energy:
-                    self.best_state = neighbor.copy()
-                    self.best_energy = neighbor_energy
-                    # Play premove sound when finding better state
-                    self.play_sound(self.premove_sound)
-                    self.record_step(self.best_state, self.best_energy,
-                                   f"New Best State Found! Energy: {self.best_energy}")
-                    yield
-            
-            # Cool down
-            self.current_temperature *= self.cooling_rate
+            self.current_state = array('b', perm)
+            energy = self.count_attacks(self.current_state)
             self.current_iteration += 1
+            if energy < self.best_energy:
+                self.best_state = self.current_state[:]
+                self.best_energy = energy
             
-            # Record every 10th iteration
-            if self.current_iteration % 10 == 0:
-                self.record_step(self.current_state, self.best_energy,
-                               f"Cooling Down - Temperature: {self.current_temperature:.2f}")
-                yield
+            self.play_chirp()
+            self.record_step(self.current_state, energy, template, self.current_iteration)
+            yield
         
         # Record final state
+        self.current_state = self.best_state[:]
         if self.best_energy == 0:
             self.record_step(self.best_state, self.best_energy, "Solution Found!")
             self.play_sound(self.win_sound)
         else:
-            self.record_step(self.best_state, self.best_energy, 
-                           f"Best State Found (Energy: {self.best_energy})")
+            self.record_step(self.best_state, self.best_energy,
+                           "Best State Found (Energy: {energy})")
         
         # Always play game-end sound when solving process completes
         self.play_sound(self.gameend_sound)
@@ -339,71 +708,100 @@ class NQueensGUI:
             return
         
         self.n = new_size
+        self.select_mode()
         self.update_board_sizing()
         self.init_ui_elements()  # Reinitialize UI elements with new sizing
-        self.current_state = []
-        self.steps = []
-        self.current_step = 0
+        self.current_state = array('b', [-1] * self.n)
+        self.clear_occupancy()
+        self.clear_steps()
         self.play_sound(self.move_sound)
 
-    def draw_board(self):
+    def build_board_surface(self):
+        """Pre-render the static board (border and cells) into an off-screen surface"""
+        self.board_border = max(4, int(self.CELL_SIZE * 0.1))
+        size = self.BOARD_SIZE + self.board_border * 2
+        self.board_surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        
         # Draw board background with responsive border
-        border_size = max(4, int(self.CELL_SIZE * 0.1))
-        pygame.draw.rect(self.screen, self.BOARD_BG, 
-                        (self.board_x - border_size, self.board_y - border_size, 
-                         self.BOARD_SIZE + border_size * 2, self.BOARD_SIZE + border_size * 2), 
-                        border_radius=max(8, border_size * 2))
+        pygame.draw.rect(self.board_surface, self.BOARD_BG, (0, 0, size, size),
+                        border_radius=max(8, self.board_border * 2))
         
         for row in range(self.n):
             for col in range(self.n):
                 color = self.CREAM if (row + col) % 2 == 0 else self.GREEN
                 rect = pygame.Rect(
-                    self.board_x + col * self.CELL_SIZE,
-                    self.board_y + row * self.CELL_SIZE,
+                    self.board_border + col * self.CELL_SIZE,
+                    self.board_border + row * self.CELL_SIZE,
                     self.CELL_SIZE,
                     self.CELL_SIZE
                 )
-                pygame.draw.rect(self.screen, color, rect, 
+                pygame.draw.rect(self.board_surface, color, rect, 
                                border_radius=max(4, int(self.CELL_SIZE * 0.1)))
+        
+        # Match the display's pixel format so blitting it takes the fast path
+        self.board_surface = self.board_surface.convert_alpha()
+
+    def build_background(self):
+        """Pre-render everything static in a frame: fill, title, size label and board"""
+        self.background = pygame.Surface(self.screen.get_size()).convert()
+        self.background.fill(self.BG_COLOR)
+        
+        # Title - responsive positioning
+        title = self.render_text("N-Queens Simulated Annealing", self.font, self.FONT_COLOR)
+        title_x = (self.WINDOW_WIDTH - title.get_width()) // 2
+        self.background.blit(title, (title_x, 20))
+        
+        # Title for size selection
+        size_title = self.render_text("Board Size:", self.info_font, self.FONT_COLOR)
+        self.background.blit(size_title, (self.size_buttons[self.available_sizes[0]].x,
+                                          self.size_buttons[self.available_sizes[0]].y - 25))
+        
+        self.background.blit(self.board_surface, (self.board_x - self.board_border,
+                                                  self.board_y - self.board_border))
 
     def draw_queen(self, row, col):
-        # Draw queen using image for better appearance
-        img = pygame.image.load("./assets/n_queens/queen.png")
-        img = pygame.transform.scale(img, (self.CELL_SIZE-10, self.CELL_SIZE-10))
+        # Draw queen using the cached image for better appearance
         x = self.board_x + col * self.CELL_SIZE + 5
         y = self.board_y + row * self.CELL_SIZE + 5
-        self.screen.blit(img, (x, y))
+        if self.queen_img:
+            self.screen.blit(self.queen_img, (x, y))
+        else:
+            radius = (self.CELL_SIZE - 10) // 2
+            pygame.draw.circle(self.screen, self.FONT_COLOR, (x + radius, y + radius), radius)
 
-    def draw_button(self, text, rect, enabled=True):
-        mouse_pos = pygame.mouse.get_pos()
-        is_hover = rect.collidepoint(mouse_pos)
+    def draw_queens(self):
+        """Draw all placed queens with a single batched blit"""
+        if not self.queen_img:
+            for col, row in enumerate(self.current_state):
+                if row >= 0:
+                    self.draw_queen(row, col)
+            return
+        
+        self.screen.blits([(self.queen_img, (self.board_x + col * self.CELL_SIZE + 5,
+                                             self.board_y + row * self.CELL_SIZE + 5))
+                           for col, row in enumerate(self.current_state) if row >= 0],
+                          doreturn=False)
+
+    def draw_button(self, text, rect, enabled=True, hovered_rect=None):
+        is_hover = rect is hovered_rect
         color = self.BUTTON_COLOR if enabled else self.BUTTON_DISABLED
         if enabled and is_hover:
             color = self.BUTTON_HOVER
         
         border_radius = max(6, int(min(rect.width, rect.height) * 0.15))
-        pygame.draw.rect(self.screen, color, rect, border_radius=border_radius)
         
         # Scale text to fit button
         font_size = max(12, min(rect.height // 2, rect.width // len(text) * 2))
-        temp_font = pygame.font.SysFont('Segoe UI', font_size)
-        text_surf = temp_font.render(text, True, self.BUTTON_TEXT if enabled else (200, 200, 200))
-        text_rect = text_surf.get_rect(center=rect.center)
-        self.screen.blit(text_surf, text_rect)
+        text_color = self.BUTTON_TEXT if enabled else (200, 200, 200)
+        self.screen.blit(self.button_surface(text, rect.size, color, text_color,
+                                             font_size, border_radius), rect)
 
-    def draw_size_buttons(self):
+    def draw_size_buttons(self, hovered_rect=None):
         """Draw the size selection buttons"""
-        # Title for size selection
-        size_title = self.info_font.render("Board Size:", True, self.FONT_COLOR)
-        self.screen.blit(size_title, (self.size_buttons[self.available_sizes[0]].x, 
-                                     self.size_buttons[self.available_sizes[0]].y - 25))
-        
-        mouse_pos = pygame.mouse.get_pos()
-        
         for size, rect in self.size_buttons.items():
             # Determine button color
             is_active = (size == self.n)
-            is_hover = rect.collidepoint(mouse_pos) and not self.is_solving
+            is_hover = rect is hovered_rect and not self.is_solving
             
             if is_active:
                 color = self.SIZE_BUTTON_ACTIVE
@@ -412,18 +810,13 @@ class NQueensGUI:
             else:
                 color = self.SIZE_BUTTON_INACTIVE
             
-            # Draw button
+            # Draw button and text
             border_radius = max(4, int(min(rect.width, rect.height) * 0.2))
-            pygame.draw.rect(self.screen, color, rect, border_radius=border_radius)
-            
-            # Draw text
             text = f"{size}x{size}"
             text_color = self.BUTTON_TEXT if (is_active or is_hover) else self.FONT_COLOR
             font_size = max(10, min(rect.height // 2, rect.width // 4))
-            temp_font = pygame.font.SysFont('Segoe UI', font_size)
-            text_surf = temp_font.render(text, True, text_color)
-            text_rect = text_surf.get_rect(center=rect.center)
-            self.screen.blit(text_surf, text_rect)
+            self.screen.blit(self.button_surface(text, rect.size, color, text_color,
+                                                 font_size, border_radius), rect)
 
     def draw_side_panel(self):
         # Draw panel background
@@ -432,159 +825,179 @@ class NQueensGUI:
                         (self.panel_x, self.panel_y, self.panel_width, self.panel_height),
                         border_radius=border_radius)
         
+        # Text lines are collected and blitted in one batch at the end
+        lines = []
         y = self.panel_y + 15
         line_height = max(18, int(self.panel_height * 0.04))
         
         # Title
-        title = self.info_font.render("Simulated Annealing", True, self.FONT_COLOR)
-        self.screen.blit(title, (self.panel_x + 15, y))
+        lines.append((self.panel_title, (self.panel_x + 15, y)))
         y += line_height + 10
 
         # Current board info
-        board_info = self.info_font.render(f"Board: {self.n}x{self.n}", True, self.FONT_COLOR)
-        self.screen.blit(board_info, (self.panel_x + 15, y))
+        lines.append((self.panel_board_info, (self.panel_x + 15, y)))
         y += line_height + 5
 
-        # Parameters (abbreviated for smaller screens)
-        params = [
-            f"Initial Temp: {self.initial_temperature}",
-            f"Cooling: {self.cooling_rate}",
-            f"Min Temp: {self.min_temperature}",
-            f"Max Iter: {self.max_iterations}"
-        ]
-        
-        for param in params:
-            text = self.size_font.render(param, True, self.FONT_COLOR)
-            self.screen.blit(text, (self.panel_x + 15, y))
+        # Parameters
+        for text in self.panel_params:
+            lines.append((text, (self.panel_x + 15, y)))
             y += line_height - 2
 
         y += 10
         # Current state info
-        if self.steps:
-            step = self.steps[self.current_step]
+        if self.step_energies:
+            description = self.describe_step(self.current_step)
             max_desc_length = max(20, self.panel_width // 8)  # Adaptive description length
-            desc = step['description'][:max_desc_length]
-            if len(step['description']) > max_desc_length:
+            desc = description[:max_desc_length]
+            if len(description) > max_desc_length:
                 desc += '...'
                 
             info = [
-                f"Step: {self.current_step + 1}/{len(self.steps)}",
+                f"Step: {self.current_step + 1}/{len(self.step_energies)}",
                 f"Status: {desc}",
-                f"Attacks: {step['energy']}"
+                f"Attacks: {self.step_energies[self.current_step]}"
             ]
             for text in info:
-                text_surf = self.size_font.render(text, True, self.FONT_COLOR)
-                self.screen.blit(text_surf, (self.panel_x + 15, y))
+                text_surf = self.render_text(text, self.size_font, self.FONT_COLOR)
+                lines.append((text_surf, (self.panel_x + 15, y)))
                 y += line_height - 2
 
-        # Current temperature and iteration
+        # Current temperature and iteration (only annealing has a temperature)
         if self.is_solving:
             y += 10
-            current_info = [
-                f"Temp: {self.current_temperature:.2f}",
-                f"Iter: {self.current_iteration}"
-            ]
+            current_info = [f"Iter: {self.current_iteration}"]
+            if self.mode == "annealing":
+                current_info.insert(0, f"Temp: {self.current_temperature:.2f}")
             for text in current_info:
-                text_surf = self.size_font.render(text, True, self.FONT_COLOR)
-                self.screen.blit(text_surf, (self.panel_x + 15, y))
+                text_surf = self.render_text(text, self.size_font, self.FONT_COLOR)
+                lines.append((text_surf, (self.panel_x + 15, y)))
                 y += line_height - 2
 
         # Instructions (compact for smaller screens)
         if y < self.panel_y + self.panel_height - 100:  # Only show if space available
             y += 15
-            instructions = [
-                "Instructions:",
-                "1. Select board size",
-                "2. Click to place queens",
-                f"3. Place all {self.n} queens",
-                "4. Click 'Solve'",
-                "5. Use step buttons"
-            ]
-            
-            for i, instruction in enumerate(instructions):
-                color = self.FONT_COLOR if i == 0 else (100, 100, 100)
-                text_surf = self.size_font.render(instruction, True, color)
+            for text_surf in self.panel_instructions:
                 if y + line_height > self.panel_y + self.panel_height - 20:
                     break  # Stop if running out of space
-                self.screen.blit(text_surf, (self.panel_x + 15, y))
+                lines.append((text_surf, (self.panel_x + 15, y)))
                 y += line_height - 3
+        
+        self.screen.blits(lines, doreturn=False)
 
-    def draw_ui(self):
-        self.screen.fill(self.BG_COLOR)
+    def draw_ui(self, mouse_pos=None):
+        # Query the mouse and hit-test the buttons once per frame; each button then
+        # only checks whether it is the hovered one
+        if mouse_pos is None:
+            mouse_pos = pygame.mouse.get_pos()
+        hovered = self.hovered_index(mouse_pos)
+        hovered_rect = self.hover_rects[hovered] if hovered is not None else None
         
-        # Title - responsive positioning
-        title = self.font.render("N-Queens Simulated Annealing", True, self.FONT_COLOR)
-        title_x = (self.WINDOW_WIDTH - title.get_width()) // 2
-        self.screen.blit(title, (title_x, 20))
+        # Background, titles and board in one blit
+        self.screen.blit(self.background, (0, 0))
         
         # Fullscreen button
         fs_text = "Full" if not self.is_fullscreen else "Win"
-        self.draw_button(fs_text, self.fullscreen_rect, True)
+        self.draw_button(fs_text, self.fullscreen_rect, True, hovered_rect)
         
         # Draw size selection buttons
-        self.draw_size_buttons()
+        self.draw_size_buttons(hovered_rect)
         
-        # Draw board
-        self.draw_board()
-        for row, col in self.current_state:
-            self.draw_queen(row, col)
+        # Draw queens
+        self.draw_queens()
             
         # Draw side panel
         self.draw_side_panel()
-        
-        # Draw control buttons
-        self.draw_button("Solve", self.solve_rect, len(self.current_state) == self.n and not self.is_solving)
-        self.draw_button("Reset", self.reset_rect, not self.is_solving)
-        self.draw_button("Prev", self.prev_step_rect, self.current_step > 0 and not self.is_solving)
-        self.draw_button("Next", self.next_step_rect, self.current_step < len(self.steps) - 1 and not self.is_solving)
+        self.draw_controls(hovered_rect)
+
+    def draw_controls(self, hovered_rect=None):
+        """Draw the solve, reset and step buttons"""
+        self.draw_button("Solve", self.solve_rect, self.can_solve(), hovered_rect)
+        self.draw_button("Reset", self.reset_rect, not self.is_solving, hovered_rect)
+        self.draw_button("Prev", self.prev_step_rect, self.can_step_back(), hovered_rect)
+        self.draw_button("Next", self.next_step_rect, self.can_step_forward(), hovered_rect)
+
+    def draw_solver_view(self):
+        """Repaint only the solver_rects, leaving the rest of the frame as drawn"""
+        # Restoring the background also restores the empty board
+        for rect in self.solver_rects:
+            self.screen.blit(self.background, rect, rect)
+        self.draw_queens()
+        self.draw_side_panel()
+        # Every control is disabled while solving, so none shows hover
+        self.draw_controls()
+
+    def can_solve(self):
+        return self.is_board_full() and not self.is_solving
+
+    def can_step_back(self):
+        return self.current_step > 0 and not self.is_solving
+
+    def can_step_forward(self):
+        return self.current_step < len(self.step_energies) - 1 and not self.is_solving
+
+    def start_solve(self):
+        """Start the solver for this board size once every queen is placed"""
+        if not self.can_solve():
+            return
+        if self.mode == "exhaustive":
+            self.annealing_generator = self.exhaustive_search()
+        else:
+            self.annealing_generator = self.simulated_annealing()
+        self.is_solving = True
+        self.solve_frames = 0
+        self.play_sound(self.premove_sound)
+
+    def reset_board(self):
+        """Remove every queen and forget the recorded steps"""
+        self.current_state = array('b', [-1] * self.n)
+        self.clear_occupancy()
+        self.clear_steps()
+
+    def prev_step(self):
+        if not self.can_step_back():
+            return
+        self.current_step -= 1
+        self.current_state = self.step_state(self.current_step)
+        self.play_sound(self.premove_sound)
+
+    def next_step(self):
+        if not self.can_step_forward():
+            return
+        # Check if this is the last step before incrementing
+        if self.current_step == len(self.step_energies) - 2:  # Moving to the last step
+            self.play_sound(self.gameend_sound)
+        else:
+            self.play_sound(self.premove_sound)
+        self.current_step += 1
+        self.current_state = self.step_state(self.current_step)
 
     def handle_click(self, pos):
         if self.is_solving:
             return
-            
-        # Check fullscreen button
-        if self.fullscreen_rect.collidepoint(pos):
-            self.toggle_fullscreen()
-            return
-            
-        # Check size button clicks
-        for size, rect in self.size_buttons.items():
+        
+        # Buttons first; the first one hit handles the click
+        for rect, handler in self.click_handlers:
             if rect.collidepoint(pos):
-                self.change_board_size(size)
+                handler()
                 return
         
-        # Check control button clicks
-        if self.solve_rect.collidepoint(pos) and len(self.current_state) == self.n:
-            self.annealing_generator = self.simulated_annealing()
-            self.is_solving = True
-            self.play_sound(self.premove_sound)
-        elif self.reset_rect.collidepoint(pos):
-            self.current_state = []
-            self.steps = []
-            self.current_step = 0
-        elif self.prev_step_rect.collidepoint(pos) and self.current_step > 0:
-            self.current_step -= 1
-            self.current_state = self.steps[self.current_step]['state'].copy()
-            self.play_sound(self.premove_sound)
-        elif self.next_step_rect.collidepoint(pos) and self.current_step < len(self.steps) - 1:
-            # Check if this is the last step before incrementing
-            if self.current_step == len(self.steps) - 2:  # Moving to the last step
-                self.play_sound(self.gameend_sound)
-            else:
-                self.play_sound(self.premove_sound)
-            self.current_step += 1
-            self.current_state = self.steps[self.current_step]['state'].copy()
-        elif (self.board_x <= pos[0] < self.board_x + self.BOARD_SIZE and
-              self.board_y <= pos[1] < self.board_y + self.BOARD_SIZE):
+        if (self.board_x <= pos[0] < self.board_x + self.BOARD_SIZE and
+                self.board_y <= pos[1] < self.board_y + self.BOARD_SIZE):
             # Handle board clicks
             col = (pos[0] - self.board_x) // self.CELL_SIZE
             row = (pos[1] - self.board_y) // self.CELL_SIZE
             
             # Ensure click is within board bounds
             if 0 <= row < self.n and 0 <= col < self.n:
-                if not any(q[1] == col for q in self.current_state) and len(self.current_state) < self.n:
-                    self.current_state.append((row, col))
+                # Keep the state a permutation: one queen per column and per row
+                row_bit, col_bit = 1 << row, 1 << col
+                if not (self.used_rows & row_bit or self.used_cols & col_bit):
+                    self.current_state[col] = row
+                    self.used_rows |= row_bit
+                    self.used_cols |= col_bit
                     self.play_sound(self.move_sound)
+                else:
+                    self.play_sound(self.error_sound)
 
     def handle_keypress(self, key):
         """Handle keyboard shortcuts"""
@@ -593,12 +1006,40 @@ class NQueensGUI:
         elif key == pygame.K_ESCAPE and self.is_fullscreen:
             self.toggle_fullscreen()
 
+    def hovered_index(self, pos):
+        """Return the index in hover_rects of the button under pos, or None"""
+        for i, rect in enumerate(self.hover_rects):
+            if rect.collidepoint(pos):
+                return i
+        return None
+
+    def update_hover(self, pos):
+        """Mark the buttons the pointer entered or left as needing a repaint"""
+        hovered = self.hovered_index(pos)
+        if hovered != self.hovered_button:
+            for i in (self.hovered_button, hovered):
+                if i is not None:
+                    self.dirty_rects.append(self.hover_rects[i])
+            self.hovered_button = hovered
+
     def run(self):
         clock = pygame.time.Clock()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            if self.is_solving or self.needs_redraw or self.dirty_rects:
+                events = pygame.event.get()
+            else:
+                # Nothing to animate or repaint: block in SDL until the next event
+                events = [pygame.event.wait()] + pygame.event.get()
+            
+            for event in events:
+                if event.type == pygame.MOUSEMOTION:
+                    self.update_hover(event.pos)
+                    continue
+                
+                # Any other event (click, key, window expose) may change the view
+                self.needs_redraw = True
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
@@ -611,14 +1052,40 @@ class NQueensGUI:
 
             # Process annealing steps
             if self.is_solving and self.annealing_generator:
+                # Short solves animate one step per frame; longer ones speed up by one
+                # more step per frame every half second, within the per-frame time budget
+                self.solve_frames += 1
+                deadline = pygame.time.get_ticks() + self.frame_budget_ms
                 try:
-                    next(self.annealing_generator)
+                    for _ in range(1 + self.solve_frames // 30):
+                        next(self.annealing_generator)
+                        if pygame.time.get_ticks() >= deadline:
+                            break
                 except StopIteration:
                     self.is_solving = False
                     self.annealing_generator = None
+                if self.is_solving:
+                    self.solver_dirty = True
+                else:
+                    # Finishing re-enables the controls
+                    self.needs_redraw = True
 
-            self.draw_ui()
-            pygame.display.flip()
+            # Skip drawing entirely while nothing on screen has changed
+            if self.needs_redraw:
+                self.draw_ui(pygame.mouse.get_pos())
+                pygame.display.flip()
+            elif self.dirty_rects or self.solver_dirty:
+                if self.dirty_rects:
+                    # Hover colors changed: redraw the frame, present just the affected buttons
+                    self.draw_ui(pygame.mouse.get_pos())
+                else:
+                    self.draw_solver_view()
+                if self.solver_dirty:
+                    self.dirty_rects.extend(self.solver_rects)
+                pygame.display.update(self.dirty_rects)
+            self.needs_redraw = False
+            self.solver_dirty = False
+            self.dirty_rects.clear()
             clock.tick(60)
 
         pygame.quit()
@@ -1,65 +1,116 @@
 import random
 import math
 import copy
+import os
+import sys
 import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from rich import print
 from rich.table import Table
 
 
+BLANK = "#"
+GOAL_STATE = [[1, 2, 3], [4, 5, 6], [7, 8, "#"]]
+
+
+def pack_state(grid):
+    """Pack a 3x3 grid into one int, 4 bits per cell with the blank as 0."""
+    packed = 0
+    for idx, value in enumerate(cell for row in grid for cell in row):
+        if value != BLANK:
+            packed |= value << (idx * 4)
+    return packed
+
+
+def unpack_state(packed):
+    """Rebuild the 3x3 grid of a packed state."""
+    cells = [(packed >> (idx * 4)) & 0xF or BLANK for idx in range(9)]
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
+
+def _manhattan_table(goal):
+    """Return MDIST[tile][idx], the Manhattan distance of tile at cell idx from its goal."""
+    goal_cells = [cell for row in goal for cell in row]
+    table = [[0] * 9 for _ in range(9)]  # Row 0 is the blank, which is not counted
+    for goal_idx, tile in enumerate(goal_cells):
+        if tile != BLANK:
+            for idx in range(9):
+                table[tile][idx] = abs(idx // 3 - goal_idx // 3) + abs(idx % 3 - goal_idx % 3)
+    return table
+
+
+GOAL_PACKED = pack_state(GOAL_STATE)
+MDIST = _manhattan_table(GOAL_STATE)
+
+
+# NEIGHBORS[idx] lists the cells the blank can move to from cell idx
+NEIGHBORS = ((1, 3), (0, 2, 4), (1, 5), (0, 4, 6), (1, 3, 5, 7), (2, 4, 8), (3, 7), (4, 6, 8), (5, 7))
+
+# FORWARD_MOVES[idx][prev_idx] leaves out the move back to prev_idx, which would
+# just undo the last move; pass prev_idx = idx to get every move
+FORWARD_MOVES = tuple(
+    tuple(tuple(move for move in NEIGHBORS[idx] if move != prev_idx) for prev_idx in range(9))
+    for idx in range(9)
+)
+
+
+def _slide(packed, blank_idx, move):
+    """Slide the tile at cell move into the blank; return the new state and energy change."""
+    tile = (packed >> (move * 4)) & 0xF
+    new_state = (packed & ~(0xF << (move * 4))) | (tile << (blank_idx * 4))
+
+    # Only that tile moved, so only its distance term changes
+    return new_state, MDIST[tile][blank_idx] - MDIST[tile][move]
+
+
 class EightTilesPuzzle:
     def __init__(self, initial_state=None):
-        self.state = (
+        initial_state = (
             initial_state if initial_state else [[5, 1, 3], [4, 2, 8], [6, 7, "#"]]
         )
-        self.goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, "#"]]
-        self.blank_pos = self._find_blank()
+        self.goal_state = GOAL_STATE
+
+        # States are packed ints: the tile in row i, column j sits in the 4 bits
+        # at cell index 3 * i + j, so a move is a couple of shifts and masks
+        self.packed = pack_state(initial_state)
+        self.blank_idx = self._find_blank()
+
+        # Cached so neighbors can update it by the move's delta instead of rescanning
+        self.heuristic = self.calculate_heuristic()
+
+    @property
+    def state(self):
+        """The current state as a 3x3 grid."""
+        return unpack_state(self.packed)
 
     def _find_blank(self):
-        """Find the position of the blank tile."""
-        for i in range(3):
-            for j in range(3):
-                if self.state[i][j] == "#":
-                    return (i, j)
+        """Find the cell index of the blank tile."""
+        for idx in range(9):
+            if not (self.packed >> (idx * 4)) & 0xF:
+                return idx
         return None
 
     def _get_possible_moves(self):
-        """Get all possible moves from the current state."""
-        i, j = self.blank_pos
-        moves = []
-
-        # Check up
-        if i > 0:
-            moves.append((-1, 0))
-        # Check down
-        if i < 2:
-            moves.append((1, 0))
-        # Check left
-        if j > 0:
-            moves.append((0, -1))
-        # Check right
-        if j < 2:
-            moves.append((0, 1))
-
-        return moves
+        """Get the cells the blank can move to from the current state."""
+        return list(NEIGHBORS[self.blank_idx])
 
     def _apply_move(self, move):
         """Apply a move to the current state."""
-        di, dj = move
-        i, j = self.blank_pos
+        # Slide the tile at the target cell into the blank, leaving the blank behind
+        new_state, energy_diff = _slide(self.packed, self.blank_idx, move)
 
-        # Create a new state
-        new_state = copy.deepcopy(self.state)
+        return new_state, move, energy_diff
 
-        # Swap the blank with the tile in the move direction
-        new_state[i][j], new_state[i + di][j + dj] = (
-            new_state[i + di][j + dj],
-            new_state[i][j],
-        )
-
-        # Update the blank position
-        new_blank_pos = (i + di, j + dj)
-
-        return new_state, new_blank_pos
+    def _with_state(self, new_state, new_blank_idx, heuristic):
+        """Return a puzzle like this one but in the given state and heuristic."""
+        # A shallow copy is enough since the state is an int and the goal grid is
+        # never modified
+        puzzle = copy.copy(self)
+        puzzle.packed = new_state
+        puzzle.blank_idx = new_blank_idx
+        puzzle.heuristic = heuristic
+        return puzzle
 
     def get_random_neighbor(self):
         """Generate a random neighboring state."""
@@ -70,40 +121,34 @@ class EightTilesPuzzle:
         move = random.choice(moves)
 
         # Apply the move
-        new_state, new_blank_pos = self._apply_move(move)
-
-        # Create a new puzzle with the new state
-        neighbor = copy.deepcopy(self)
-        neighbor.state = new_state
-        neighbor.blank_pos = new_blank_pos
+        new_state, new_blank_idx, energy_diff = self._apply_move(move)
 
-        return neighbor
+        # Create a new puzzle with the new state; only the moved tile changes the
+        # heuristic, so it's carried over from this one
+        return self._with_state(new_state, new_blank_idx, self.heuristic + energy_diff)
 
     def calculate_heuristic(self):
         """Calculate the Manhattan distance heuristic."""
-        distance = 0
-
-        for i in range(3):
-            for j in range(3):
-                value = self.state[i][j]
-
-                # Skip the blank tile
-                if value == "#":
-                    continue
-
-                # Find the position of the value in the goal state
-                for gi in range(3):
-                    for gj in range(3):
-                        if self.goal_state[gi][gj] == value:
-                            # Calculate Manhattan distance
-                            distance += abs(i - gi) + abs(j - gj)
-                            break
-
-        return distance
+        # Distances are precomputed per tile and cell; the blank's entries are all 0
+        packed = self.packed
+        return sum(MDIST[(packed >> (idx * 4)) & 0xF][idx] for idx in range(9))
+
+    def is_solvable(self):
+        """Check whether the goal state can be reached from the current state."""
+        # On a 3-wide board no move changes the parity of the tile inversions
+        # (counted in goal order), and the goal itself has none
+        goal_order = {
+            tile: idx for idx, tile in enumerate(cell for row in self.goal_state for cell in row)
+        }
+        tiles = [goal_order[cell] for row in self.state for cell in row if cell != BLANK]
+        inversions = sum(
+            1 for a in range(len(tiles)) for b in range(a + 1, len(tiles)) if tiles[a] > tiles[b]
+        )
+        return inversions % 2 == 0
 
     def is_goal(self):
         """Check if the current state is the goal state."""
-        return self.state == self.goal_state
+        return self.packed == GOAL_PACKED
 
     def print_state(self):
         """Print the current state of the puzzle."""
@@ -130,55 +175,154 @@ def simulated_annealing(
     cooling_rate=0.995,
     min_temperature=0.01,
     max_iterations=10000,
+    chain_length=20,
 ):
     """Solve the 8 tiles puzzle using simulated annealing."""
-    # Initialize variables
-    current_puzzle = copy.deepcopy(puzzle)
-    best_puzzle = copy.deepcopy(current_puzzle)
-    current_energy = current_puzzle.calculate_heuristic()
+    # Initialize variables; the caller's puzzle is only read, never modified
+    current_energy = puzzle.heuristic
     best_energy = current_energy
     temperature = initial_temperature
     iteration = 0
 
-    # For tracking solution path
-    moves_history = []
-    moves_history.append(copy.deepcopy(current_puzzle.state))
+    # The loop works on the packed state as plain ints instead of puzzle objects
+    current_state = puzzle.packed
+    blank_idx = puzzle.blank_idx
+    goal_state = GOAL_PACKED
+    best_state, best_blank_idx = current_state, blank_idx
+    prev_blank_idx = blank_idx  # No previous move yet
+
+    # Bind the RNG to a local; it is called once or twice per iteration
+    rand = random.random
+
+    # For tracking solution path; packed states take 8 bytes each and are only
+    # unpacked into grids when printed
+    moves_history = array("Q")
+    moves_history.append(current_state)
 
     while (
         temperature > min_temperature
         and iteration < max_iterations
-        and not current_puzzle.is_goal()
+        and current_state != goal_state
     ):
-        # Generate a random neighbor
-        neighbor_puzzle = current_puzzle.get_random_neighbor()
-        neighbor_energy = neighbor_puzzle.calculate_heuristic()
-
-        # Calculate the energy (cost) difference
-        energy_diff = neighbor_energy - current_energy
-
-        # Accept the neighbor if it's better or with a certain probability
-        if energy_diff < 0 or random.random() < math.exp(-energy_diff / temperature):
-            current_puzzle = neighbor_puzzle
-            current_energy = neighbor_energy
-            moves_history.append(copy.deepcopy(current_puzzle.state))
-
-            # Update the best solution if necessary
-            if current_energy < best_energy:
-                best_puzzle = copy.deepcopy(current_puzzle)
-                best_energy = current_energy
+        # Try a chain of moves at this temperature before cooling, as in the
+        # classical formulation, instead of cooling after every proposal.
+        # A move shifts one tile by one cell, so the heuristic always changes
+        # by exactly 1 and every uphill move has the same acceptance probability
+        uphill_acceptance = math.exp(-1.0 / temperature)
+        for _ in range(min(chain_length, max_iterations - iteration)):
+            # Pick a random neighbor; its energy (cost) difference comes from the
+            # moved tile alone, so the full heuristic is never recomputed
+            # (indexing with rand() is much cheaper than random.choice). Moves that
+            # would only undo the last accepted one are skipped.
+            moves = FORWARD_MOVES[blank_idx][prev_blank_idx]
+            move = moves[int(rand() * len(moves))]
+            new_state, energy_diff = _slide(current_state, blank_idx, move)
+            iteration += 1
+
+            # Accept the neighbor if it's better or with probability exp(-1 / T)
+            if energy_diff < 0 or rand() < uphill_acceptance:
+                prev_blank_idx = blank_idx
+                current_state, blank_idx = new_state, move
+                current_energy += energy_diff
+                moves_history.append(current_state)
+
+                # Update the best solution if necessary
+                if current_energy < best_energy:
+                    best_state, best_blank_idx = current_state, blank_idx
+                    best_energy = current_energy
+
+                # The heuristic is 0 only at the goal
+                if current_energy == 0:
+                    break
 
         # Cool down the temperature
         temperature *= cooling_rate
-        iteration += 1
 
+    best_puzzle = puzzle._with_state(best_state, best_blank_idx, best_energy)
     return best_puzzle, best_energy, iteration, moves_history
 
 
+def _run_chain(args):
+    """Run one seeded annealing chain; a top-level function so workers can pickle it."""
+    puzzle, seed, initial_temperature, cooling_rate, min_temperature, max_iterations = args
+    random.seed(seed)
+    return simulated_annealing(
+        puzzle, initial_temperature, cooling_rate, min_temperature, max_iterations
+    )
+
+
+def simulated_annealing_ensemble(
+    puzzle, chains=None, min_temperature=0.01, max_iterations=100000
+):
+    """Run independent annealing chains in parallel and return the best result."""
+    # One chain per CPU core by default, so every worker stays busy
+    if chains is None:
+        chains = os.cpu_count() or 1
+
+    # Alternate between a hotter, slower schedule that explores more and a quick one;
+    # the hotter one goes first since it is the more reliable on its own
+    schedules = [(5.0, 0.999), (1.0, 0.995)]
+    base_seed = random.randrange(2**32)
+    jobs = [
+        (puzzle, base_seed + k, *schedules[k % 2], min_temperature, max_iterations)
+        for k in range(chains)
+    ]
+
+    with ProcessPoolExecutor(max_workers=min(chains, os.cpu_count() or 1)) as executor:
+        results = list(executor.map(_run_chain, jobs))
+
+    # Lowest energy wins; among solutions, prefer the shortest path
+    return min(results, key=lambda result: (result[1], len(result[3])))
+
+
+def ida_star(puzzle):
+    """Solve the 8 tiles puzzle optimally using IDA* with the Manhattan heuristic.
+
+    Returns the path to the goal as an array of packed states, or None if the
+    puzzle cannot be solved.
+    """
+    if not puzzle.is_solvable():
+        return None
+
+    goal_state = GOAL_PACKED
+    path = array("Q", [puzzle.packed])
+    found = -1  # Returned by search instead of a bound once the goal is reached
+
+    def search(state, blank_idx, prev_blank_idx, cost, heuristic, bound):
+        """Depth-first search below the bound; return found or the smallest f that exceeded it."""
+        estimate = cost + heuristic
+        if estimate > bound:
+            return estimate
+        if state == goal_state:
+            return found
+
+        next_bound = math.inf
+        for move in FORWARD_MOVES[blank_idx][prev_blank_idx]:
+            new_state, energy_diff = _slide(state, blank_idx, move)
+            path.append(new_state)
+            result = search(new_state, move, blank_idx, cost + 1, heuristic + energy_diff, bound)
+            if result == found:
+                return found
+            path.pop()
+            next_bound = min(next_bound, result)
+
+        return next_bound
+
+    # Deepen the bound to the smallest estimate that exceeded the previous one
+    heuristic = puzzle.heuristic
+    bound = heuristic
+    while True:
+        bound = search(puzzle.packed, puzzle.blank_idx, puzzle.blank_idx, 0, heuristic, bound)
+        if bound == found:
+            return path
+
+
 def print_solution_path(moves_history):
     """Print the solution path."""
     print(f"Solution found in [bold green]{len(moves_history) - 1}[/bold green] moves:")
 
-    for i, state in enumerate(moves_history):
+    for i, packed in enumerate(moves_history):
+        state = unpack_state(packed)
         print(f"Move [cyan]{i}[/cyan]:")
         table = Table(show_header=False, border_style="bright_blue")
 
@@ -226,22 +370,28 @@ def main():
     print(table)
     print()
 
+    # IDA* finds the shortest solution; annealing is kept as a demo behind --anneal
+    if "--anneal" not in sys.argv:
+        print("[bold cyan]Solving with IDA*...[/bold cyan]")
+        start_time = time.time()
+        path = ida_star(puzzle)
+        end_time = time.time()
+
+        if path is None:
+            print("[bold red]This puzzle cannot be solved[/bold red]: no sequence of moves reaches the goal.")
+        else:
+            print(
+                f"[bold green]Optimal solution found[/bold green] in {end_time - start_time:.2f} seconds!"
+            )
+            print_solution_path(path)
+        return
+
     print("[bold cyan]Solving with simulated annealing...[/bold cyan]")
     start_time = time.time()
 
-    # Parameters for simulated annealing
-    initial_temperature = 1.0
-    cooling_rate = 0.995
-    min_temperature = 0.01
-    max_iterations = 50000
-
-    # Run simulated annealing
-    best_puzzle, best_energy, iterations, moves_history = simulated_annealing(
-        puzzle,
-        initial_temperature=initial_temperature,
-        cooling_rate=cooling_rate,
-        min_temperature=min_temperature,
-        max_iterations=max_iterations,
+    # Run one annealing chain per CPU core in parallel and keep the best one
+    best_puzzle, best_energy, iterations, moves_history = simulated_annealing_ensemble(
+        puzzle, min_temperature=0.01, max_iterations=100000
     )
 
     end_time = time.time()
@@ -253,44 +403,13 @@ def main():
         print(f"Final heuristic value: [magenta]{best_energy}[/magenta]")
         print_solution_path(moves_history)
     else:
-        print(f"[bold red]No solution found[/bold red] after {iterations} iterations.")
+        print(
+            f"[bold red]No solution found[/bold red] by any chain after {end_time - start_time:.2f} seconds."
+        )
         print(f"Best heuristic value achieved: [magenta]{best_energy}[/magenta]")
         print("[yellow]Best state found:[/yellow]")
         best_puzzle.print_state()
 
-    # Try again with different parameters if no solution was found
-    if not best_puzzle.is_goal():
-        print("[bold yellow]Trying again with different parameters...[/bold yellow]")
-
-        # Different parameters for better exploration
-        initial_temperature = 5.0  # Higher initial temperature
-        cooling_rate = 0.999  # Slower cooling rate
-        max_iterations = 100000  # More iterations
-
-        start_time = time.time()
-        best_puzzle, best_energy, iterations, moves_history = simulated_annealing(
-            puzzle,
-            initial_temperature=initial_temperature,
-            cooling_rate=cooling_rate,
-            min_temperature=min_temperature,
-            max_iterations=max_iterations,
-        )
-        end_time = time.time()
-
-        if best_puzzle.is_goal():
-            print(
-                f"[bold green]Solution found[/bold green] in {iterations} iterations and {end_time - start_time:.2f} seconds!"
-            )
-            print(f"Final heuristic value: [magenta]{best_energy}[/magenta]")
-            print_solution_path(moves_history)
-        else:
-            print(
-                f"[bold red]Still no solution found[/bold red] after {iterations} iterations."
-            )
-            print(f"Best heuristic value achieved: [magenta]{best_energy}[/magenta]")
-            print("[yellow]Best state found:[/yellow]")
-            best_puzzle.print_state()
-
 
 if __name__ == "__main__":
     main()